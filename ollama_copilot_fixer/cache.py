@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import json
+import os
 import shutil
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from .config import AppConfig
 
@@ -21,35 +26,115 @@ class CacheInfo:
     work_bytes: int
 
 
-def _dir_size(path: Path) -> int:
+_SIZES_MANIFEST = ".sizes.json"
+
+
+def _iter_file_sizes(path: str, dir_mtimes: dict[str, int] | None = None) -> Iterator[int]:
+    # os.scandir reuses the directory listing's cached file type (and on Windows, the
+    # size), so classifying an entry does not cost an extra stat per file. Recurse on
+    # plain str paths; wrapping entries in Path would only add allocations.
+    try:
+        if dir_mtimes is not None:
+            # Record before listing so a concurrent change invalidates the result.
+            dir_mtimes[path] = os.stat(path).st_mtime_ns
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_file_sizes(entry.path, dir_mtimes)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        yield entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        # best-effort: entry vanished or is unreadable
+                        pass
+    except OSError:
+        pass
+
+
+def _dir_size(path: Path, dir_mtimes: dict[str, int] | None = None) -> int:
     if not path.exists():
         return 0
+    return sum(_iter_file_sizes(os.fspath(path), dir_mtimes))
 
-    total = 0
-    for p in path.rglob("*"):
-        try:
-            if p.is_file():
-                total += p.stat().st_size
-        except Exception:
-            # best-effort
-            pass
-    return total
+
+def _load_size_manifest(config: AppConfig) -> dict[str, Any]:
+    try:
+        data = json.loads((config.cache_root / _SIZES_MANIFEST).read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            return data
+    except Exception:
+        # Missing or malformed manifest just means everything is recomputed.
+        pass
+    return {}
+
+
+def _save_size_manifest(config: AppConfig, manifest: dict[str, Any]) -> None:
+    path = config.cache_root / _SIZES_MANIFEST
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        # best-effort
+        pass
+
+
+def _dirs_unchanged(dir_mtimes: Any) -> bool:
+    if not isinstance(dir_mtimes, dict) or not dir_mtimes:
+        return False
+    try:
+        return all(os.stat(d).st_mtime_ns == m for d, m in dir_mtimes.items())
+    except OSError:
+        return False
+
+
+def _cached_dir_size(path: Path, manifest: dict[str, Any]) -> tuple[int, bool]:
+    """Return the size of ``path`` and whether its manifest entry changed.
+
+    The manifest entry is reused if no directory changed. A directory's mtime only moves when its direct children are added, removed or
+    renamed, so the entry keeps the mtime of every directory in the subtree. Checking
+    it costs one stat per directory instead of one per file. Files growing in place
+    are not detected until something in their directory is created or removed.
+    """
+    key = str(path)
+    cached = manifest.get(key)
+    if isinstance(cached, dict) and _dirs_unchanged(cached.get("dirs")):
+        return int(cached.get("total", 0)), False
+
+    dir_mtimes: dict[str, int] = {}
+    total = _dir_size(path, dir_mtimes)
+    if dir_mtimes:
+        manifest[key] = {"dirs": dir_mtimes, "total": total}
+        return total, True
+    return total, manifest.pop(key, None) is not None
+
+
+_BYTE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 def format_bytes(num_bytes: int) -> str:
-    size = float(num_bytes)
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size < 1024 or unit == "TB":
-            return f"{size:.2f} {unit}" if unit != "B" else f"{int(size)} B"
-        size /= 1024
-    return f"{num_bytes} B"
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    # Each unit is 2**10 of the previous one, so the bit length picks the unit directly.
+    i = min((num_bytes.bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{num_bytes / (1 << (10 * i)):.2f} {_BYTE_UNITS[i]}"
 
 
 def get_cache_info(config: AppConfig) -> CacheInfo:
-    hf_bytes = _dir_size(config.hf_cache_dir)
-    downloads_bytes = _dir_size(config.downloads_dir)
-    merged_bytes = _dir_size(config.merged_dir)
-    work_bytes = _dir_size(config.work_dir)
+    manifest = _load_size_manifest(config)
+
+    # The subtrees are independent and the walk is syscall-bound (the GIL is released
+    # around scandir/stat), so size them concurrently. Capped at 4 workers.
+    dirs = [config.hf_cache_dir, config.downloads_dir, config.merged_dir, config.work_dir]
+    with ThreadPoolExecutor(max_workers=min(4, len(dirs))) as pool:
+        results = list(pool.map(lambda d: _cached_dir_size(d, manifest), dirs))
+
+    (hf_bytes, _), (downloads_bytes, _), (merged_bytes, _), (work_bytes, _) = results
+    # Rewrite the manifest only if an entry was recomputed or dropped.
+    if any(changed for _, changed in results):
+        _save_size_manifest(config, manifest)
     total = hf_bytes + downloads_bytes + merged_bytes + work_bytes
 
     return CacheInfo(
@@ -68,10 +153,9 @@ def get_cache_info(config: AppConfig) -> CacheInfo:
 
 def ensure_cache_dirs(config: AppConfig) -> None:
     config.cache_root.mkdir(parents=True, exist_ok=True)
-    config.hf_cache_dir.mkdir(parents=True, exist_ok=True)
-    config.downloads_dir.mkdir(parents=True, exist_ok=True)
-    config.merged_dir.mkdir(parents=True, exist_ok=True)
-    config.work_dir.mkdir(parents=True, exist_ok=True)
+    # All subdirectories sit directly under cache_root, which now exists.
+    for d in (config.hf_cache_dir, config.downloads_dir, config.merged_dir, config.work_dir):
+        d.mkdir(exist_ok=True)
 
 
 def clear_cache(
@@ -92,6 +176,14 @@ def clear_cache(
     if clear_work:
         targets.append(config.work_dir)
 
-    for t in targets:
-        if t.exists():
-            shutil.rmtree(t, ignore_errors=True)
+    existing = [t for t in targets if t.exists()]
+    if existing:
+        # The targets are disjoint trees, so unlinking them in parallel is safe.
+        with ThreadPoolExecutor(max_workers=len(existing)) as pool:
+            wait([pool.submit(shutil.rmtree, t, ignore_errors=True) for t in existing])
+
+    manifest = _load_size_manifest(config)
+    # Pop every target before testing; any() over a generator would stop at the first hit.
+    removed = [manifest.pop(str(t), None) for t in targets]
+    if any(r is not None for r in removed):
+        _save_size_manifest(config, manifest)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import os
 import re
 import shutil
@@ -11,31 +12,42 @@ from pathlib import Path
 from . import console
 from .cache import clear_cache, ensure_cache_dirs, format_bytes, get_cache_info
 from .config import load_config
-from .gguf import detect_architecture, is_sharded_model, merge_sharded_model, shard_files, shards_fingerprint
-from .huggingface import hf_download_cached
-from .modelfile import generate_modelfile, supported_architectures
-from .ollama import create_model, list_models, run_model
-from .paths import find_llama_gguf_split
-from .source import parse_model_source
+
+# Setup-only modules are imported inside main()/build_setup_parser() so the
+# 'cache' subcommands start without loading them.
+
+
+_RE_NON_NAME_CHARS = re.compile(r"[^a-z0-9-_]")
+_RE_DASHES = re.compile(r"-+")
+_RE_SHARD_SUFFIX_5 = re.compile(r"-\d{5}-of-\d{5}$")
+_RE_SHARD_SUFFIX_4 = re.compile(r"-\d{4}-of-\d{4}$")
 
 
 def _sanitize_model_name(name: str) -> str:
     s = name.strip().lower()
-    s = re.sub(r"[^a-z0-9-_]", "-", s)
-    s = re.sub(r"-+", "-", s).strip("-")
+    s = _RE_NON_NAME_CHARS.sub("-", s)
+    s = _RE_DASHES.sub("-", s).strip("-")
     return s
 
 
 def _auto_model_name_from_path(p: Path) -> str:
     base = p.stem.lower()
-    base = re.sub(r"[^a-z0-9-_]", "-", base)
-    base = re.sub(r"-+", "-", base)
-    base = re.sub(r"-\d{5}-of-\d{5}$", "", base)
-    base = re.sub(r"-\d{4}-of-\d{4}$", "", base)
+    base = _RE_NON_NAME_CHARS.sub("-", base)
+    base = _RE_DASHES.sub("-", base)
+    base = _RE_SHARD_SUFFIX_5.sub("", base)
+    base = _RE_SHARD_SUFFIX_4.sub("", base)
     return base.strip("-") or "ollama-model"
 
 
+@functools.lru_cache(maxsize=1)
+def _find_ollama() -> str | None:
+    # PATH lookup is memoized for repeated in-process main() calls.
+    return shutil.which("ollama")
+
+
 def build_setup_parser() -> argparse.ArgumentParser:
+    from .modelfile import supported_architectures
+
     p = argparse.ArgumentParser(
         prog="ollama-copilot-fixer",
         description="Download/merge GGUF and create an Ollama model with Tool-capable template for GitHub Copilot.",
@@ -71,6 +83,14 @@ def build_setup_parser() -> argparse.ArgumentParser:
     )
     p.add_argument("--temperature", type=float, default=0.7)
     p.add_argument("--quantization-type", help="Quant filter for Hugging Face downloads, e.g. Q4_0, Q4_K_M, IQ2_XXS")
+    p.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Query Hugging Face even if a matching GGUF is already in the cache. The cache is "
+            "only consulted first when a quantization is given (--quantization-type or ':QUANT')."
+        ),
+    )
     p.add_argument(
         "--llama-cpp-path",
         help="Path to llama.cpp folder or llama-gguf-split.exe (required to merge sharded GGUFs).",
@@ -142,12 +162,19 @@ def main(argv: list[str] | None = None) -> int:
     if argv and argv[0].lower() == "cache":
         return _run_cache(argv[1:])
 
+    from .gguf import detect_architecture, is_sharded_model, merge_sharded_model, shard_files, shards_fingerprint
+    from .huggingface import hf_download_cached
+    from .modelfile import generate_modelfile_bytes
+    from .ollama import create_model, list_models, run_model
+    from .paths import find_llama_gguf_split
+    from .source import parse_model_source
+
     args = build_setup_parser().parse_args(argv)
 
     config = load_config(config_path=args.config, cache_root_override=args.cache_root)
     ensure_cache_dirs(config)
 
-    if not shutil.which("ollama"):
+    if not _find_ollama():
         console.error("Ollama ('ollama') not found on PATH. Install from https://ollama.ai and ensure it's running.")
         return 1
 
@@ -168,7 +195,8 @@ def main(argv: list[str] | None = None) -> int:
             if quant:
                 console.info(f"Quantization filter: {quant}")
             console.info("Downloading GGUF(s) from Hugging Face...")
-            gguf_path = hf_download_cached(parsed.repo_id, config, quant)
+            gguf_path = hf_download_cached(parsed.repo_id, config, quant, refresh=args.refresh)
+            # hf_download_cached returns an already-resolved path.
             working_gguf = Path(gguf_path)
             console.success(f"Downloaded/selected: {working_gguf.name}")
         else:
@@ -185,7 +213,8 @@ def main(argv: list[str] | None = None) -> int:
         final_gguf = working_gguf
 
         console.info("Checking for sharded GGUF...")
-        if is_sharded_model(str(working_gguf)):
+        sharded = is_sharded_model(str(working_gguf))
+        if sharded:
             console.warn("Sharded model detected; merge required.")
             llama_split = find_llama_gguf_split(args.llama_cpp_path)
             if not llama_split:
@@ -211,7 +240,8 @@ def main(argv: list[str] | None = None) -> int:
         else:
             console.success("Single-file model (no merge needed).")
 
-        size_gb = final_gguf.stat().st_size / (1024**3)
+        final_stat = final_gguf.stat()
+        size_gb = final_stat.st_size / (1 << 30)
         console.success(f"Working with: {final_gguf.name} ({size_gb:.2f} GB)")
 
         model_name = args.model_name
@@ -240,26 +270,30 @@ def main(argv: list[str] | None = None) -> int:
             # applying Llama-style stop tokens here because they can cause empty outputs.
             console.info("Nemotron detected; using Nemotron-compatible Modelfile settings.")
 
-        modelfile_text = generate_modelfile(
-            absolute_model_path=str(final_gguf.resolve()),
+        modelfile_bytes = generate_modelfile_bytes(
+            # Every branch above yields a resolved path except a reused merge, which lives
+            # under cache_root; absolute() guards that case without a realpath walk.
+            absolute_model_path=str(final_gguf.absolute()),
             architecture=arch,
             context_length=args.context_length,
             temperature=args.temperature,
             extra_stop=extra_stop or None,
             system_message=system_message,
         )
-        modelfile_path.write_text(modelfile_text, encoding="utf-8")
+        # Written as bytes: no re-encode, and no newline translation on Windows, so
+        # TEMPLATE blocks never pick up stray "\r" characters.
+        modelfile_path.write_bytes(modelfile_bytes)
         console.success(f"Wrote Modelfile: {modelfile_path}")
 
         console.info("Creating model in Ollama...")
-        create_out = create_model(model_name, str(modelfile_path))
-        if create_out.strip():
-            console.info(create_out.strip())
+        create_out = create_model(model_name, str(modelfile_path)).strip()
+        if create_out:
+            console.info(create_out.decode("utf-8", errors="replace"))
         console.success(f"Created model: {model_name}")
 
         console.info("Verifying with 'ollama list'...")
         lst = list_models()
-        if model_name in lst:
+        if model_name.encode("utf-8") in lst:
             console.success("Model is registered in Ollama.")
         else:
             console.warn("Model name not found in 'ollama list' output (this can be transient).")
@@ -277,10 +311,9 @@ def main(argv: list[str] | None = None) -> int:
 
         # Cleanup cached merged artifacts if configured.
         try:
-            if is_sharded_model(str(working_gguf)) and (not config.keep_merged):
-                if 'merged' in locals() and isinstance(merged, Path) and merged.exists():
-                    if 'merged_created' in locals() and merged_created:
-                        merged.unlink(missing_ok=True)
+            if sharded and (not config.keep_merged):
+                if merged_created and merged.exists():
+                    merged.unlink(missing_ok=True)
         except Exception:
             pass
 
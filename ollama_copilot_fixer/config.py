@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import functools
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
@@ -39,27 +40,34 @@ class AppConfig:
     keep_downloads: bool
     keep_merged: bool
 
-    @property
-    def hf_cache_dir(self) -> Path:
-        return self.cache_root / "hf"
+    # Derived from cache_root once in __post_init__ rather than on every access.
+    hf_cache_dir: Path = field(init=False, repr=False, compare=False)
+    # Used by the hf CLI fallback (it downloads/copies here).
+    downloads_dir: Path = field(init=False, repr=False, compare=False)
+    merged_dir: Path = field(init=False, repr=False, compare=False)
+    work_dir: Path = field(init=False, repr=False, compare=False)
 
-    @property
-    def downloads_dir(self) -> Path:
-        # Used by the hf CLI fallback (it downloads/copies here).
-        return self.cache_root / "downloads"
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "hf_cache_dir", self.cache_root / "hf")
+        object.__setattr__(self, "downloads_dir", self.cache_root / "downloads")
+        object.__setattr__(self, "merged_dir", self.cache_root / "merged")
+        object.__setattr__(self, "work_dir", self.cache_root / "work")
 
-    @property
-    def merged_dir(self) -> Path:
-        return self.cache_root / "merged"
 
-    @property
-    def work_dir(self) -> Path:
-        return self.cache_root / "work"
+def _read_json(path: Path) -> dict[str, Any]:
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    # Copy so callers cannot mutate the memoized dict.
+    return dict(_read_json_cached(str(path), st.st_mtime_ns, st.st_size))
 
 
-def _read_json(path: Path) -> dict[str, Any]:
+@functools.lru_cache(maxsize=8)
+def _read_json_cached(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    # mtime/size are only part of the cache key, so an edited file is re-read.
     try:
-        text = path.read_text(encoding="utf-8")
+        text = Path(path).read_text(encoding="utf-8")
         data = json.loads(text)
         if isinstance(data, dict):
             return data
@@ -82,13 +90,13 @@ def load_config(*, config_path: str | None, cache_root_override: str | None) ->
 
     data = _read_json(resolved_config_path)
 
-    cache_root = (
-        Path(cache_root_override).expanduser().resolve()
-        if cache_root_override
-        else Path(str(data.get("cache_root") or "")).expanduser().resolve()
-        if data.get("cache_root")
-        else _default_cache_root()
-    )
+    configured_cache_root = data.get("cache_root")
+    if cache_root_override:
+        cache_root = Path(cache_root_override).expanduser().resolve()
+    elif configured_cache_root:
+        cache_root = Path(str(configured_cache_root)).expanduser().resolve()
+    else:
+        cache_root = _default_cache_root()
 
     keep_downloads = bool(data.get("keep_downloads", True))
     keep_merged = bool(data.get("keep_merged", False))
@@ -4,7 +4,7 @@ import sys
 
 
 def _print(prefix: str, message: str, stream) -> None:
-    stream.write(f"{prefix} {message}\n")
+    print(prefix, message, file=stream)
 
 
 def info(message: str) -> None:
@@ -1,70 +1,88 @@
 from __future__ import annotations
 
+import functools
 import os
 import re
 import subprocess
 import hashlib
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
-_SHARD_PATTERNS = [
-    re.compile(r"-\d{5}-of-\d{5}\.gguf$", re.IGNORECASE),
-    re.compile(r"-part-\d+\.gguf$", re.IGNORECASE),
-    re.compile(r"\.part\d+\.gguf$", re.IGNORECASE),
-]
+# Shard filename suffixes: "-00001-of-00003.gguf", "-part-1.gguf" and ".part1.gguf".
+# Stripping the match gives the shard-set base name.
+_RE_SHARD_SUFFIX = re.compile(r"(?:-\d{5}-of-\d{5}|-part-\d+|\.part\d+)\.gguf$", re.IGNORECASE)
+_RE_ANY_SHARD = re.compile(r"-\d{5}-of-\d{5}|part-?\d+", re.IGNORECASE)
 
 
-def is_sharded_model(file_path: str) -> bool:
-    name = Path(file_path).name
-    if any(p.search(name) for p in _SHARD_PATTERNS):
-        return True
+def _shard_base(name: str) -> str:
+    return _RE_SHARD_SUFFIX.sub("", name)
+
+
+def _iter_shard_entries(directory: Path, base: str) -> Iterator[os.DirEntry[str]]:
+    """Yield files in ``directory`` named ``<base>*.gguf`` that look like shards.
 
-    directory = Path(file_path).parent
-    base = name
-    base = re.sub(r"-\d{5}-of-\d{5}\.gguf$", "", base, flags=re.IGNORECASE)
-    base = re.sub(r"-part-\d+\.gguf$", "", base, flags=re.IGNORECASE)
-    base = re.sub(r"\.part\d+\.gguf$", "", base, flags=re.IGNORECASE)
+    Single os.scandir pass; matching is case-insensitive like _RE_SHARD_SUFFIX.
+    """
+    base_lower = base.lower()
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                name_lower = entry.name.lower()
+                if not (name_lower.startswith(base_lower) and name_lower.endswith(".gguf")):
+                    continue
+                if not _RE_ANY_SHARD.search(entry.name):
+                    continue
+                try:
+                    if entry.is_file():
+                        yield entry
+                except OSError:
+                    pass
+    except OSError:
+        return
 
-    related = [
-        p
-        for p in directory.glob(f"{base}*.gguf")
-        if re.search(r"-\d{5}-of-\d{5}|part-?\d+", p.name, flags=re.IGNORECASE)
-    ]
-    return len(related) > 1
 
+def is_sharded_model(file_path: str) -> bool:
+    # Decided by filename alone, so single-file models never touch the directory. A name
+    # without a shard suffix is its own shard-set base, so a sibling scan would only ever
+    # match files named "<name>...part<N>.gguf", which no real shard set uses.
+    return bool(_RE_SHARD_SUFFIX.search(Path(file_path).name))
 
-def shard_files(first_shard_path: str) -> list[Path]:
-    first = Path(first_shard_path)
-    directory = first.parent
-    name = first.name
 
-    base = re.sub(r"-\d{5}-of-\d{5}\.gguf$", "", name, flags=re.IGNORECASE)
-    base = re.sub(r"-part-\d+\.gguf$", "", base, flags=re.IGNORECASE)
-    base = re.sub(r"\.part\d+\.gguf$", "", base, flags=re.IGNORECASE)
+@dataclass(frozen=True)
+class ShardMeta:
+    name: str
+    path: str
+    size: int
+    mtime: int
 
-    shards = [
-        p
-        for p in directory.glob(f"{base}*.gguf")
-        if re.search(r"-\d{5}-of-\d{5}|part-?\d+", p.name, flags=re.IGNORECASE)
-    ]
-    return sorted(shards, key=lambda p: p.name)
 
+def shard_files(first_shard_path: str) -> list[ShardMeta]:
+    """Return the shard set containing ``first_shard_path``, sorted by name.
 
-def shards_fingerprint(shards: list[Path]) -> str:
+    Size and mtime come from the scandir entries, so fingerprinting needs no further stat.
+    """
+    first = Path(first_shard_path)
+    shards: list[ShardMeta] = []
+    for e in _iter_shard_entries(first.parent, _shard_base(first.name)):
+        try:
+            # Follows symlinks (HF snapshots link to blobs), like Path.stat().
+            st = e.stat()
+        except OSError:
+            continue
+        shards.append(ShardMeta(e.name, e.path, st.st_size, int(st.st_mtime)))
+    return sorted(shards, key=lambda m: m.name)
+
+
+def shards_fingerprint(shards: list[ShardMeta]) -> str:
     """Stable-ish fingerprint for a shard set, based on names + sizes + mtimes.
 
     Avoid hashing full contents (too expensive for large models).
     """
     h = hashlib.sha256()
-    for p in shards:
-        try:
-            st = p.stat()
-            h.update(p.name.encode("utf-8", errors="ignore"))
-            h.update(str(st.st_size).encode("ascii"))
-            h.update(str(int(st.st_mtime)).encode("ascii"))
-            h.update(b"\n")
-        except Exception:
-            h.update(p.name.encode("utf-8", errors="ignore"))
-            h.update(b"\n")
+    for m in shards:
+        h.update(b"%s%d%d\n" % (m.name.encode("utf-8", errors="ignore"), m.size, m.mtime))
     return h.hexdigest()[:16]
 
 
@@ -93,38 +111,77 @@ def merge_sharded_model(first_shard_path: str, output_path: str, llama_split_pat
     return str(Path(output_path).resolve())
 
 
+try:
+    # Optional: RE2 matches in linear time, so '.*' patterns cannot backtrack badly on
+    # binary header data. Falls back to the stdlib engine.
+    import re2  # type: ignore
+except ImportError:
+    re2 = None
+else:
+    # pyre2 and fb-re2 also install a "re2" module, without google-re2's Options API.
+    if not hasattr(re2, "Options"):
+        re2 = None
+
+
+def _compile_header_re(pattern: bytes) -> Any:
+    if re2 is not None:
+        try:
+            # The header is binary, so match bytes as Latin-1 rather than UTF-8.
+            options = re2.Options()
+            options.encoding = re2.Options.Encoding.LATIN1
+            options.case_sensitive = False
+            return re2.compile(pattern, options)
+        except Exception:
+            # Unexpected re2 build/API; the stdlib engine gives the same matches.
+            pass
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Checked in order; the first pattern found anywhere in the header wins.
+_ARCH_CONTENT_PATTERNS: list[tuple[Any, str]] = [
+    (_compile_header_re(rb"llama.*3\.[0-9]|llama3|llama-3"), "llama3"),
+    (_compile_header_re(rb"mistral|mixtral"), "mistral"),
+    (_compile_header_re(rb"phi-3|phi3|phi-4|phi4"), "phi3"),
+    (_compile_header_re(rb"gemma.*2|gemma-2"), "gemma2"),
+    (_compile_header_re(rb"qwen.*2|qwen-2"), "qwen"),
+]
+
+_ARCH_FILENAME_PATTERNS: list[tuple[re.Pattern[str], str]] = [
+    (re.compile(r"nemotron", re.IGNORECASE), "nemotron"),
+    (re.compile(r"llama.*3", re.IGNORECASE), "llama3"),
+    (re.compile(r"mistral|mixtral", re.IGNORECASE), "mistral"),
+    (re.compile(r"phi", re.IGNORECASE), "phi3"),
+    (re.compile(r"gemma", re.IGNORECASE), "gemma2"),
+    (re.compile(r"qwen", re.IGNORECASE), "qwen"),
+]
+
+
 def detect_architecture(file_path: str) -> str:
-    # Best-effort detection
+    # The result only depends on the file contents, so memoize on (path, size, mtime).
+    try:
+        st = os.stat(file_path)
+        return _detect_architecture(file_path, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return _detect_architecture(file_path, -1, -1)
+
+
+@functools.lru_cache(maxsize=512)
+def _detect_architecture(file_path: str, size: int, mtime_ns: int) -> str:
+    # Best-effort detection. Scan the raw header bytes case-insensitively rather than
+    # decoding and lower-casing a copy of them.
     try:
         with open(file_path, "rb") as f:
-            chunk = f.read(16384)
-        content = chunk.decode("ascii", errors="ignore").lower()
+            content = f.read(16384)
     except Exception:
-        content = ""
-
-    if re.search(r"llama.*3\.[0-9]|llama3|llama-3", content):
-        return "llama3"
-    if re.search(r"mistral|mixtral", content):
-        return "mistral"
-    if re.search(r"phi-3|phi3|phi-4|phi4", content):
-        return "phi3"
-    if re.search(r"gemma.*2|gemma-2", content):
-        return "gemma2"
-    if re.search(r"qwen.*2|qwen-2", content):
-        return "qwen"
-
-    filename = Path(file_path).name.lower()
-    if "nemotron" in filename:
-        return "nemotron"
-    if re.search(r"llama.*3", filename):
-        return "llama3"
-    if re.search(r"mistral|mixtral", filename):
-        return "mistral"
-    if re.search(r"phi", filename):
-        return "phi3"
-    if re.search(r"gemma", filename):
-        return "gemma2"
-    if re.search(r"qwen", filename):
-        return "qwen"
+        content = b""
+
+    for pattern, arch in _ARCH_CONTENT_PATTERNS:
+        if pattern.search(content):
+            return arch
+
+    filename = Path(file_path).name
+    for pattern, arch in _ARCH_FILENAME_PATTERNS:
+        if pattern.search(filename):
+            return arch
 
     return "llama3"
@@ -1,32 +1,84 @@
 from __future__ import annotations
 
+import importlib.util
+import json
 import os
+import re
 import subprocess
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from .config import AppConfig
 
 
-_HF_DOWNLOAD_HELP: str | None = None
+_HF_SUPPORTS_SYMLINKS: bool | None = None
+_HF_CAPS_FILE = ".hf_caps.json"
+_HF_DOWNLOAD_TIMEOUT = "60"
+_OUTPUT_TAIL_LINES = 200
+_SHARD_COUNT_RE = re.compile(r"-00001-of-(\d+)\.gguf$", re.IGNORECASE)
+_SHARD_NAME_RE = re.compile(r"-\d{5}-of-\d{5}\.gguf$", re.IGNORECASE)
 
 
-def _hf_supports_local_dir_use_symlinks() -> bool:
-    global _HF_DOWNLOAD_HELP
-    if _HF_DOWNLOAD_HELP is None:
+def _hf_binary_key() -> list[Any] | None:
+    # Identifies the installed hf CLI; a reinstall/upgrade changes mtime or size.
+    exe = shutil_which("hf")
+    if not exe:
+        return None
+    try:
+        st = os.stat(exe)
+    except OSError:
+        return None
+    return [exe, st.st_mtime_ns, st.st_size]
+
+
+def _load_hf_symlinks_support(config: AppConfig) -> bool | None:
+    """Whether 'hf download' accepts --local-dir-use-symlinks, or None if not yet known.
+
+    The answer is learned from a real download attempt and persisted in the HF cache dir
+    keyed by the hf binary, so later processes pass the right arguments first time.
+    """
+    global _HF_SUPPORTS_SYMLINKS
+    if _HF_SUPPORTS_SYMLINKS is not None:
+        return _HF_SUPPORTS_SYMLINKS
+
+    key = _hf_binary_key()
+    if key is not None:
         try:
-            proc = subprocess.run(
-                ["hf", "download", "--help"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-            )
-            _HF_DOWNLOAD_HELP = proc.stdout or ""
+            caps = json.loads((config.hf_cache_dir / _HF_CAPS_FILE).read_text(encoding="utf-8"))
+            if caps.get("key") == key:
+                _HF_SUPPORTS_SYMLINKS = bool(caps["supports_symlinks"])
         except Exception:
-            _HF_DOWNLOAD_HELP = ""
+            pass
+    return _HF_SUPPORTS_SYMLINKS
+
+
+def _save_hf_symlinks_support(config: AppConfig, supported: bool) -> None:
+    global _HF_SUPPORTS_SYMLINKS
+    _HF_SUPPORTS_SYMLINKS = supported
 
-    return "--local-dir-use-symlinks" in (_HF_DOWNLOAD_HELP or "")
+    key = _hf_binary_key()
+    if key is None:
+        return
+    caps_path = config.hf_cache_dir / _HF_CAPS_FILE
+    try:
+        tmp = caps_path.with_name(caps_path.name + ".tmp")
+        tmp.write_text(json.dumps({"key": key, "supports_symlinks": supported}), encoding="utf-8")
+        os.replace(tmp, caps_path)
+    except Exception:
+        # best-effort; we just learn it again next time
+        pass
+
+
+def _is_unknown_symlinks_option(output: str) -> bool:
+    # argparse: "unrecognized arguments: ..."; click/typer: "No such option: ..."
+    lowered = output.lower()
+    return "--local-dir-use-symlinks" in lowered and (
+        "unrecognized arguments" in lowered or "no such option" in lowered
+    )
 
 
 def hf_download(repo_id: str, dest_dir: str, quantization_type: str | None) -> str:
@@ -36,84 +88,64 @@ def hf_download(repo_id: str, dest_dir: str, quantization_type: str | None) -> s
     )
 
 
-def hf_download_cached(repo_id: str, config: AppConfig, quantization_type: str | None) -> str:
+def hf_download_cached(
+    repo_id: str,
+    config: AppConfig,
+    quantization_type: str | None,
+    *,
+    on_line: Callable[[str], None] | None = None,
+    refresh: bool = False,
+) -> str:
     """Download or reuse a GGUF from Hugging Face into the app-managed cache.
 
+    A complete selection already in the huggingface_hub cache is reused without any
+    network call unless ``refresh`` is set.
     Prefer the python library (huggingface_hub) to avoid local-dir copies.
-    Falls back to the 'hf' CLI if the library is not importable.
+    Falls back to the 'hf' CLI if the library is not importable; its output is passed
+    line by line to ``on_line`` when given.
     """
+    # 0) Reuse a previous huggingface_hub download without querying the repo.
+    if not refresh:
+        cached = _cached_repo_ggufs(config, repo_id, quantization_type)
+        if cached:
+            return _first_shard_or_only(cached)
+
     # 1) Prefer huggingface_hub if available.
+    # huggingface_hub reads these at import time, so set them first.
+    os.environ.setdefault("HF_HUB_DOWNLOAD_TIMEOUT", _HF_DOWNLOAD_TIMEOUT)
+    # Multi-connection Rust downloader for large files. huggingface_hub raises if this is
+    # enabled without hf_transfer installed, so only opt in when it is importable.
+    added_hf_transfer = False
+    if "HF_HUB_ENABLE_HF_TRANSFER" not in os.environ and importlib.util.find_spec("hf_transfer") is not None:
+        os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
+        added_hf_transfer = True
     try:
         from huggingface_hub import HfApi, hf_hub_download  # type: ignore
 
         api = HfApi()
-        all_files = api.list_repo_files(repo_id=repo_id)
-        gguf_files = [f for f in all_files if f.lower().endswith(".gguf")]
-        gguf_files = [f for f in gguf_files if not _is_helper_gguf(Path(f).name)]
-        if not gguf_files:
-            raise RuntimeError(
-                "No GGUF files found in the repository. If this is a gated repo, run 'hf auth login' first."
+        files = _select_repo_ggufs(api.list_repo_files(repo_id=repo_id), quantization_type)
+
+        def _download(filename: str) -> Path:
+            return Path(
+                hf_hub_download(
+                    repo_id=repo_id,
+                    filename=filename,
+                    cache_dir=str(config.hf_cache_dir),
+                )
             )
 
-        def _matches_quant(path: str) -> bool:
-            if not quantization_type:
-                return True
-            return quantization_type.lower() in Path(path).name.lower()
+        # Shards are independent; fetch them concurrently (hf_hub_download locks per file).
+        if len(files) == 1:
+            local_paths = [_download(files[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(files))) as pool:
+                local_paths = list(pool.map(_download, files))
 
-        candidates = [f for f in gguf_files if _matches_quant(f)]
-        if quantization_type and not candidates:
-            raise RuntimeError(
-                f"No GGUF files matched quantization '{quantization_type}'. Try omitting --quantization-type."
-            )
-        if not candidates:
-            candidates = gguf_files
-
-        # Prefer first shard if present, otherwise prefer the largest file by metadata.
-        # Note: list_repo_files does not include sizes, so we prefer shard-first and otherwise
-        # download the first candidate and let the caller proceed.
-        first_shards = [f for f in candidates if _is_first_shard(Path(f).name)]
-        selected = sorted(first_shards or candidates)[0]
-
-        selected_name = Path(selected).name
-
-        # If this is a sharded set, download only that shard group.
-        if _is_first_shard(selected_name):
-            base = selected_name
-            base = base.rsplit("-00001-of-", 1)[0]
-            shard_paths = [
-                f
-                for f in candidates
-                if Path(f).name.lower().startswith(base.lower() + "-") and Path(f).name.lower().endswith(".gguf")
-            ]
-            if not shard_paths:
-                shard_paths = [selected]
-
-            local_paths: list[Path] = []
-            for sp in sorted(shard_paths):
-                local_file = Path(
-                    hf_hub_download(
-                        repo_id=repo_id,
-                        filename=sp,
-                        cache_dir=str(config.hf_cache_dir),
-                    )
-                )
-                local_paths.append(local_file)
-
-            # Return the first shard local path.
-            first_local = [p for p in local_paths if _is_first_shard(p.name)]
-            return str(sorted(first_local or local_paths, key=lambda p: p.name)[0].resolve())
-
-        # Non-sharded: download only the selected file.
-        local_file = Path(
-            hf_hub_download(
-                repo_id=repo_id,
-                filename=selected,
-                cache_dir=str(config.hf_cache_dir),
-            )
-        )
-        return str(local_file.resolve())
+        return _first_shard_or_only(local_paths)
     except ImportError:
-        pass
+        # Don't leak our opt-in to the hf CLI below, which may lack hf_transfer.
+        if added_hf_transfer:
+            os.environ.pop("HF_HUB_ENABLE_HF_TRANSFER", None)
 
     # 2) Fall back to hf CLI (will copy into a local dir, but we keep it cacheable).
     if not shutil_which("hf"):
@@ -126,28 +158,15 @@ def hf_download_cached(repo_id: str, config: AppConfig, quantization_type: str |
     download_dir = config.downloads_dir / safe_repo
     download_dir.mkdir(parents=True, exist_ok=True)
 
-    def _run(include_pattern: str) -> str:
-        # Some hf CLI versions support --local-dir-use-symlinks, others don't.
-        # When unsupported, the CLI typically falls back to copying if symlinks aren't available.
-        args = [
-            "hf",
-            "download",
-            repo_id,
-            "--local-dir",
-            str(download_dir),
-            "--include",
-            include_pattern,
-        ]
-
-        if _hf_supports_local_dir_use_symlinks():
-            args.insert(6, "--local-dir-use-symlinks")
-            args.insert(7, "False")
-
+    def _exec(args: list[str]) -> tuple[int, str]:
         env = os.environ.copy()
         # Keep Hugging Face cache under the app cache so users can clear it via this tool.
         env.setdefault("HF_HOME", str(config.hf_cache_dir))
         # Avoid noisy warnings in environments where symlinks are blocked.
         env.setdefault("HF_HUB_DISABLE_SYMLINKS_WARNING", "1")
+        # Large shards over slow links can exceed the 10s default. HF_HUB_ENABLE_HF_TRANSFER
+        # is not set here: the hf CLI may live in another environment without hf_transfer.
+        env.setdefault("HF_HUB_DOWNLOAD_TIMEOUT", _HF_DOWNLOAD_TIMEOUT)
 
         proc = subprocess.Popen(
             args,
@@ -156,10 +175,18 @@ def hf_download_cached(repo_id: str, config: AppConfig, quantization_type: str |
             text=True,
             encoding="utf-8",
             errors="replace",
+            bufsize=1,
             env=env,
         )
+        # Stream the output (progress bars can be long) and keep only the tail for errors.
+        tail: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
         try:
-            out, _ = proc.communicate()
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                tail.append(line)
+                if on_line is not None:
+                    on_line(line.rstrip("\n"))
+            proc.wait()
         except KeyboardInterrupt:
             try:
                 proc.terminate()
@@ -170,43 +197,197 @@ def hf_download_cached(repo_id: str, config: AppConfig, quantization_type: str |
             except Exception:
                 pass
             raise
+        finally:
+            if proc.stdout is not None:
+                proc.stdout.close()
+        return proc.returncode, "".join(tail)
 
-        if proc.returncode != 0:
-            raise RuntimeError(f"HuggingFace download failed (exit {proc.returncode}).\n{out}")
+    def _run(include_pattern: str) -> str:
+        args = [
+            "hf",
+            "download",
+            repo_id,
+            "--local-dir",
+            str(download_dir),
+            "--include",
+            include_pattern,
+        ]
+        symlink_args = ["--local-dir-use-symlinks", "False"]
+
+        # Some hf CLI versions support --local-dir-use-symlinks, others don't. Rather than
+        # probing with '--help', pass it optimistically and retry without it if rejected.
+        # When unsupported, the CLI typically falls back to copying if symlinks aren't available.
+        supports_symlinks = _load_hf_symlinks_support(config)
+        returncode, out = _exec(args + symlink_args if supports_symlinks is not False else args)
+        if supports_symlinks is None:
+            if returncode != 0 and _is_unknown_symlinks_option(out):
+                _save_hf_symlinks_support(config, False)
+                returncode, out = _exec(args)
+            elif returncode == 0:
+                _save_hf_symlinks_support(config, True)
+
+        if returncode != 0:
+            raise RuntimeError(f"HuggingFace download failed (exit {returncode}).\n{out}")
         return out
 
     # If we already have a matching GGUF in the cache, reuse it.
-    existing = list(download_dir.rglob("*.gguf"))
+    ggufs = _find_ggufs(download_dir)
     if quantization_type:
-        matching = [p for p in existing if quantization_type.lower() in p.name.lower()]
-        if not matching:
+        quant_lower = quantization_type.lower()
+        if not any(quant_lower in e.name.lower() for e in ggufs):
             _run(f"*{quantization_type}*.gguf")
-            existing = list(download_dir.rglob("*.gguf"))
+            ggufs = _find_ggufs(download_dir)
             # If our filter was too strict, retry once without it.
-            if not existing:
+            if not ggufs:
                 _run("*.gguf")
-    elif not existing:
+                ggufs = _find_ggufs(download_dir)
+    elif not ggufs:
         _run("*.gguf")
+        ggufs = _find_ggufs(download_dir)
 
-    ggufs = list(download_dir.rglob("*.gguf"))
     if not ggufs:
         raise RuntimeError(
             "No GGUF files found after download. If this is a gated repo, run 'hf auth login' first."
         )
 
     # Prefer real model weights over helper GGUFs when possible.
-    primary = [p for p in ggufs if not _is_helper_gguf(p.name)]
+    primary = [e for e in ggufs if not _is_helper_gguf(e.name)]
     if not primary:
         primary = ggufs
 
     # Prefer first shard if present.
-    first_shards = [p for p in primary if _is_first_shard(p.name)]
+    first_shards = [e for e in primary if _is_first_shard(e.name)]
     if first_shards:
-        return str(sorted(first_shards, key=lambda p: p.name)[0].resolve())
+        return str(Path(min(first_shards, key=lambda e: e.name).path).resolve())
+
+    # Otherwise, pick the largest (DirEntry caches the stat result).
+    largest = max(primary, key=lambda e: e.stat().st_size)
+    return str(Path(largest.path).resolve())
+
+
+def _find_ggufs(root: Path) -> list[os.DirEntry[str]]:
+    """List ``*.gguf`` files under ``root`` with an iterative os.scandir walk.
+
+    Hidden directories (e.g. the hf CLI's ``.cache`` metadata) are skipped.
+    """
+    found: list[os.DirEntry[str]] = []
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith(".gguf") and entry.is_file():
+                            found.append(entry)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return found
+
+
+@dataclass(frozen=True)
+class _GgufCandidate:
+    path: str
+    name_lower: str
+    is_first_shard: bool
+    matches_quant: bool
+
+
+def _classify_ggufs(paths: Iterable[str], quantization_type: str | None) -> list[_GgufCandidate]:
+    """Keep non-helper ``*.gguf`` repo paths, computing every selection predicate in one pass."""
+    quant_lower = quantization_type.lower() if quantization_type else None
+    out: list[_GgufCandidate] = []
+    for path in paths:
+        # Repo paths always use '/' separators.
+        name_lower = path.rsplit("/", 1)[-1].lower()
+        if not name_lower.endswith(".gguf") or _is_helper_gguf(name_lower):
+            continue
+        out.append(
+            _GgufCandidate(
+                path=path,
+                name_lower=name_lower,
+                is_first_shard="-00001-of-" in name_lower,
+                matches_quant=quant_lower is None or quant_lower in name_lower,
+            )
+        )
+    return out
 
-    # Otherwise, pick the largest.
-    largest = sorted(primary, key=lambda p: p.stat().st_size, reverse=True)[0]
-    return str(largest.resolve())
+
+def _select_repo_ggufs(paths: Iterable[str], quantization_type: str | None) -> list[str]:
+    """Pick the repo files to download: one shard group, or a single GGUF. Sorted."""
+    gguf_files = _classify_ggufs(paths, quantization_type)
+    if not gguf_files:
+        raise RuntimeError(
+            "No GGUF files found in the repository. If this is a gated repo, run 'hf auth login' first."
+        )
+
+    candidates = [c for c in gguf_files if c.matches_quant]
+    if quantization_type and not candidates:
+        raise RuntimeError(
+            f"No GGUF files matched quantization '{quantization_type}'. Try omitting --quantization-type."
+        )
+    if not candidates:
+        candidates = gguf_files
+
+    # Prefer first shard if present, otherwise prefer the largest file by metadata.
+    # Note: list_repo_files does not include sizes, so we prefer shard-first and otherwise
+    # download the first candidate and let the caller proceed.
+    first_shards = [c for c in candidates if c.is_first_shard]
+    selected = min(first_shards or candidates, key=lambda c: c.path)
+    if not selected.is_first_shard:
+        return [selected.path]
+
+    # If this is a sharded set, download only that shard group.
+    prefix = selected.name_lower.rsplit("-00001-of-", 1)[0] + "-"
+    shard_paths = [c.path for c in candidates if c.name_lower.startswith(prefix)]
+    return sorted(shard_paths or [selected.path])
+
+
+def _first_shard_or_only(local_paths: list[Path]) -> str:
+    first_local = [p for p in local_paths if _is_first_shard(p.name)]
+    return str(min(first_local or local_paths, key=lambda p: p.name).resolve())
+
+
+def _cached_repo_ggufs(config: AppConfig, repo_id: str, quantization_type: str | None) -> list[Path] | None:
+    """Resolve the GGUF selection from the cached snapshot of the repo's main revision.
+
+    hf_hub_download(cache_dir=hf_cache_dir) stores files under
+    ``models--<owner>--<repo>/snapshots/<commit>/`` and records the commit in ``refs/main``.
+    Returns None unless the selected file (or every shard of the group) is present.
+    Only used with a quantization filter: without one the repo listing decides which
+    file is wanted, and whatever happens to be cached may not be it.
+    """
+    if not quantization_type:
+        return None
+    repo_cache = config.hf_cache_dir / ("models--" + repo_id.replace("/", "--"))
+    try:
+        revision = (repo_cache / "refs" / "main").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    snapshot = repo_cache / "snapshots" / revision
+
+    rel_paths = [os.path.relpath(e.path, snapshot).replace(os.sep, "/") for e in _find_ggufs(snapshot)]
+    try:
+        files = _select_repo_ggufs(rel_paths, quantization_type)
+    except RuntimeError:
+        return None
+
+    # A partially downloaded shard group must go back through hf_hub_download. Without its
+    # first shard the selection falls back to a lone later shard, which is not usable either.
+    m = _SHARD_COUNT_RE.search(files[0])
+    if m:
+        if len(files) != int(m.group(1)):
+            return None
+    elif any(
+        c.matches_quant and _SHARD_NAME_RE.search(c.name_lower)
+        for c in _classify_ggufs(rel_paths, quantization_type)
+    ):
+        return None
+    return [snapshot / f for f in files]
 
 
 def _is_helper_gguf(name: str) -> bool:
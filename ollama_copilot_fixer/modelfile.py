@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import functools
+import io
 from dataclasses import dataclass
 
 
 @dataclass(frozen=True)
 class ModelTemplate:
     template: str
-    stop: list[str]
+    stop: tuple[str, ...]
     renderer: str | None = None
     parser: str | None = None
 
+    @functools.cached_property
+    def rendered_template_block(self) -> str:
+        # The TEMPLATE body never varies, so it is wrapped once rather than per Modelfile.
+        return f'# Template\nTEMPLATE """{self.template}"""\n'
+
 
 _SYSTEM_MESSAGE = (
     "You are a helpful AI assistant with tool calling capabilities. "
@@ -28,7 +35,7 @@ _TEMPLATES: dict[str, ModelTemplate] = {
     # Applying Llama/Mistral-style chat templates to these models can result in empty outputs.
     "nemotron": ModelTemplate(
         template="{{ .Prompt }}",
-        stop=[],
+        stop=(),
         renderer="nemotron-3-nano",
         parser="nemotron-3-nano",
     ),
@@ -59,7 +66,7 @@ _TEMPLATES: dict[str, ModelTemplate] = {
             "{{ .Response }}<|eot_id|>"
             "{{- end }}"
         ),
-        stop=["<|start_header_id|>", "<|end_header_id|>", "<|eot_id|>"],
+        stop=("<|start_header_id|>", "<|end_header_id|>", "<|eot_id|>"),
     ),
     "mistral": ModelTemplate(
         template=(
@@ -83,7 +90,7 @@ _TEMPLATES: dict[str, ModelTemplate] = {
             "{{ .Response }}</s>\n"
             "{{- end }}"
         ),
-        stop=["</s>", "[INST]", "[/INST]"],
+        stop=("</s>", "[INST]", "[/INST]"),
     ),
     "phi3": ModelTemplate(
         template=(
@@ -110,7 +117,7 @@ _TEMPLATES: dict[str, ModelTemplate] = {
             "{{ .Response }}<|end|>\n"
             "{{- end }}"
         ),
-        stop=["<|end|>", "<|system|>", "<|user|>", "<|assistant|>"],
+        stop=("<|end|>", "<|system|>", "<|user|>", "<|assistant|>"),
     ),
     "gemma2": ModelTemplate(
         template=(
@@ -137,7 +144,7 @@ _TEMPLATES: dict[str, ModelTemplate] = {
             "{{ .Response }}<end_of_turn>\n"
             "{{- end }}"
         ),
-        stop=["<end_of_turn>", "<start_of_turn>"],
+        stop=("<end_of_turn>", "<start_of_turn>"),
     ),
     "qwen": ModelTemplate(
         template=(
@@ -165,13 +172,68 @@ _TEMPLATES: dict[str, ModelTemplate] = {
             "{{ .Response }}<|im_end|>\n"
             "{{- end }}"
         ),
-        stop=["<|im_start|>", "<|im_end|>"],
+        stop=("<|im_start|>", "<|im_end|>"),
     ),
 }
 
 
+_STOP_FMT = 'PARAMETER stop "%s"\n'
+
+
+@dataclass(frozen=True)
+class _ModelfileParts:
+    # Text before the model path, i.e. up to and including "FROM ".
+    head: str
+    # RENDERER/PARSER, the TEMPLATE block and the base stop lines.
+    body: str
+    # %-format templates for the parameter/system tail, without and with num_ctx.
+    suffix: str
+    suffix_ctx: str
+
+
+def _precompute_parts(architecture: str, mt: ModelTemplate) -> _ModelfileParts:
+    """Pre-render everything in an architecture's Modelfile that does not vary per call.
+
+    The large TEMPLATE body is kept out of the %-format templates, so it is neither
+    escaped nor re-scanned on each call.
+    """
+    # Ollama Modelfile syntax
+    head = (
+        "# Auto-generated Modelfile with Tool capability for GitHub Copilot\n"
+        f"# Architecture: {architecture}\n"
+        "\n"
+        "FROM "
+    )
+    body = (
+        "\n"
+        + (f"RENDERER {mt.renderer}\n" if mt.renderer else "")
+        + (f"PARSER {mt.parser}\n" if mt.parser else "")
+        + "\n"
+        + mt.rendered_template_block
+        + "\n# Stop sequences\n"
+        + "".join(_STOP_FMT % seq for seq in mt.stop)
+    )
+
+    # Nemotron parser/renderer handles chat/tool formatting; avoid forcing a system message
+    # that isn't referenced in the template.
+    system = '\n# System message\nSYSTEM """%(system)s"""\n' if architecture != "nemotron" else ""
+    params = "\n# Model parameters\nPARAMETER temperature %(temperature)s\n"
+    return _ModelfileParts(
+        head=head,
+        body=body,
+        suffix=params + "PARAMETER num_predict -1\n" + system,
+        suffix_ctx=params + "PARAMETER num_ctx %(context_length)s\nPARAMETER num_predict -1\n" + system,
+    )
+
+
+_PRECOMPUTED: dict[str, _ModelfileParts] = {arch: _precompute_parts(arch, mt) for arch, mt in _TEMPLATES.items()}
+
+
+_SUPPORTED_ARCHS: tuple[str, ...] = tuple(sorted(_TEMPLATES))
+
+
 def supported_architectures() -> list[str]:
-    return sorted(_TEMPLATES.keys())
+    return list(_SUPPORTED_ARCHS)
 
 
 def generate_modelfile(
@@ -183,64 +245,78 @@ def generate_modelfile(
     extra_stop: list[str] | None = None,
     system_message: str | None = None,
 ) -> str:
-    if architecture not in _TEMPLATES:
-        raise ValueError(
-            f"Unsupported architecture: {architecture}. Supported: {', '.join(supported_architectures())}"
-        )
-
-    mt = _TEMPLATES[architecture]
-    stop = list(mt.stop)
-    if extra_stop:
-        for s in extra_stop:
-            if s not in stop:
-                stop.append(s)
+    return _generate_modelfile(
+        absolute_model_path,
+        architecture,
+        context_length,
+        temperature,
+        tuple(extra_stop) if extra_stop else (),
+        system_message,
+    )
 
-    # Ollama Modelfile syntax
-    out = [
-        "# Auto-generated Modelfile with Tool capability for GitHub Copilot",
-        f"# Architecture: {architecture}",
-        "",
-        f"FROM {absolute_model_path}",
-        *(
-            [f"RENDERER {mt.renderer}"]
-            if mt.renderer
-            else []
-        ),
-        *(
-            [f"PARSER {mt.parser}"]
-            if mt.parser
-            else []
-        ),
-        "",
-        "# Template",
-        f'TEMPLATE """{mt.template}"""',
-        "",
-        "# Stop sequences",
-    ]
-
-    for seq in stop:
-        out.append(f'PARAMETER stop "{seq}"')
-
-    out += [
-        "",
-        "# Model parameters",
-        f"PARAMETER temperature {temperature}",
-        "PARAMETER num_predict -1",
-        "",
-    ]
 
-    # Nemotron parser/renderer handles chat/tool formatting; avoid forcing a system message
-    # that isn't referenced in the template.
-    if architecture != "nemotron":
-        out += [
-            "# System message",
-            f'SYSTEM """{system_message or _SYSTEM_MESSAGE}"""',
-            "",
-        ]
-
-    if context_length is not None:
-        if context_length <= 0:
-            raise ValueError("context_length must be a positive integer")
-        out.insert(out.index("PARAMETER num_predict -1"), f"PARAMETER num_ctx {context_length}")
-
-    return "\n".join(out)
+
+def generate_modelfile_bytes(
+    *,
+    absolute_model_path: str,
+    architecture: str,
+    context_length: int | None,
+    temperature: float,
+    extra_stop: list[str] | None = None,
+    system_message: str | None = None,
+) -> bytes:
+    """Like generate_modelfile, but UTF-8 encoded and ready to write to disk."""
+    return _generate_modelfile_bytes(
+        absolute_model_path,
+        architecture,
+        context_length,
+        temperature,
+        tuple(extra_stop) if extra_stop else (),
+        system_message,
+    )
+
+
+@functools.lru_cache(maxsize=32, typed=True)
+def _generate_modelfile_bytes(*args: object) -> bytes:
+    return _generate_modelfile(*args).encode("utf-8")
+
+
+# typed=True: temperature 1 and 1.0 compare equal but render differently.
+@functools.lru_cache(maxsize=32, typed=True)
+def _generate_modelfile(
+    absolute_model_path: str,
+    architecture: str,
+    context_length: int | None,
+    temperature: float,
+    extra_stop: tuple[str, ...],
+    system_message: str | None,
+) -> str:
+    mt = _TEMPLATES.get(architecture)
+    if mt is None:
+        raise ValueError(f"Unsupported architecture: {architecture}. Supported: {', '.join(_SUPPORTED_ARCHS)}")
+    if context_length is not None and context_length <= 0:
+        raise ValueError("context_length must be a positive integer")
+
+    parts = _PRECOMPUTED[architecture]
+    buf = io.StringIO()
+    buf.write(parts.head)
+    buf.write(absolute_model_path)
+    buf.write(parts.body)
+
+    # Base stops are already in parts.body; only append new, de-duplicated extras
+    # (in order) without copying the base list.
+    for s in dict.fromkeys(extra_stop):
+        if s not in mt.stop:
+            buf.write(_STOP_FMT % s)
+
+    suffix = parts.suffix if context_length is None else parts.suffix_ctx
+    # %s renders the temperature exactly like str() (e.g. "1.0"); %g would not.
+    buf.write(
+        suffix
+        % {
+            "temperature": temperature,
+            "context_length": context_length,
+            "system": system_message or _SYSTEM_MESSAGE,
+        }
+    )
+    return buf.getvalue()
@@ -1,29 +1,246 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import ipaddress
+import json
+import os
+import re
 import subprocess
+import urllib.error
+import urllib.request
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import urlsplit
 
+_DEFAULT_HOST = "127.0.0.1"
+_DEFAULT_PORT = 11434
+# Applies to connecting and to each read, not to the whole generation: generation is
+# always streamed, so the limit is between chunks.
+_API_TIMEOUT = 600
+_OUTPUT_TAIL_LINES = 200
+_BATCH_SIZE = 8
+# Matches only the marker (and an optional ":", ".", ")" or "-"), so an answer that starts
+# on the marker's own line is kept.
+_ANSWER_MARKER_RE = re.compile(r"^[ \t]*###[ \t]*A(\d+)\b[ \t]*[:.)\-]?[ \t]*", re.MULTILINE)
 
-def _run(args: list[str]) -> str:
-    proc = subprocess.run(
+
+def _run(args: list[str]) -> bytes:
+    # Output is kept as bytes; it is only decoded for an error or when a caller needs text.
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        out = proc.stdout.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Command failed (exit {proc.returncode}): {' '.join(args)}\n{out}")
+    return proc.stdout
+
+
+def _run_text(args: list[str]) -> str:
+    return _run(args).decode("utf-8", errors="replace")
+
+
+def _run_stream(args: list[str], on_line: Callable[[str], None]) -> None:
+    proc = subprocess.Popen(
         args,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
         encoding="utf-8",
         errors="replace",
+        bufsize=1,
     )
+    # Hand each line over as it arrives; only a short tail is kept for the error message.
+    tail: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            tail.append(line)
+            on_line(line)
+        proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        if proc.stdout is not None:
+            proc.stdout.close()
     if proc.returncode != 0:
-        raise RuntimeError(f"Command failed (exit {proc.returncode}): {' '.join(args)}\n{proc.stdout}")
-    return proc.stdout
+        raise RuntimeError(f"Command failed (exit {proc.returncode}): {' '.join(args)}\n{''.join(tail)}")
 
 
-def create_model(model_name: str, modelfile_path: str) -> str:
+def create_model(model_name: str, modelfile_path: str) -> bytes:
     return _run(["ollama", "create", model_name, "-f", modelfile_path])
 
 
-def list_models() -> str:
+def list_models() -> bytes:
     return _run(["ollama", "list"])
 
 
-def run_model(model_name: str, prompt: str) -> str:
-    return _run(["ollama", "run", model_name, prompt])
+def _api_base() -> str:
+    # Mirrors the CLI: OLLAMA_HOST may be "host", "host:port" or a URL. Without a scheme
+    # the port defaults to 11434; an explicit http:// or https:// implies 80 or 443.
+    host = os.environ.get("OLLAMA_HOST", "").strip() or _DEFAULT_HOST
+    default_port = _DEFAULT_PORT
+    if "://" not in host:
+        if host.count(":") > 1 and not host.startswith("["):
+            # Bare IPv6 address such as "::1" (no port), which the CLI also accepts.
+            host = f"[{host}]"
+        host = f"http://{host}"
+    else:
+        default_port = 443 if host.lower().startswith("https://") else 80
+    try:
+        parts = urlsplit(host)
+        port = parts.port or default_port
+    except ValueError:
+        # Unparseable OLLAMA_HOST; fall back to the default local server.
+        return f"http://{_DEFAULT_HOST}:{_DEFAULT_PORT}"
+    hostname = parts.hostname or "127.0.0.1"
+    if hostname == "0.0.0.0":
+        # Bind-all address; connect via loopback.
+        hostname = "127.0.0.1"
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    return f"{parts.scheme}://{hostname}:{port}{parts.path.rstrip('/')}"
+
+
+def _is_loopback(hostname: str | None) -> bool:
+    if not hostname:
+        return False
+    if hostname.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(hostname).is_loopback
+    except ValueError:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _direct_opener() -> urllib.request.OpenerDirector:
+    # Like the Go CLI, never route loopback traffic through http_proxy/HTTP_PROXY.
+    return urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def _open_post(path: str, payload: dict[str, Any]) -> Any:
+    url = _api_base() + path
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    open_ = _direct_opener().open if _is_loopback(urlsplit(url).hostname) else urllib.request.urlopen
+    try:
+        return open_(req, timeout=_API_TIMEOUT)
+    except urllib.error.HTTPError as e:
+        body = e.read().decode("utf-8", errors="replace")
+        raise RuntimeError(f"Ollama API request failed (HTTP {e.code}): {path}\n{body}") from e
+
+
+def _generate_stream(model_name: str, prompt: str, stream: Callable[[str], None]) -> None:
+    # /api/generate streams newline-delimited JSON objects, one per generated chunk.
+    with _open_post("/api/generate", {"model": model_name, "prompt": prompt, "stream": True}) as resp:
+        for raw in resp:
+            if not raw.strip():
+                continue
+            data = json.loads(raw)
+            if "error" in data:
+                raise RuntimeError(f"Ollama generation failed: {data['error']}")
+            chunk = data.get("response")
+            if chunk:
+                stream(str(chunk))
+            if data.get("done"):
+                break
+
+
+def run_model(model_name: str, prompt: str, stream: Callable[[str], None] | None = None) -> str:
+    """Generate a response to ``prompt``.
+
+    Talks to the running Ollama server over its HTTP API rather than spawning an
+    'ollama run' process per call; falls back to the CLI if the server is unreachable.
+
+    If ``stream`` is given, output is passed to it chunk by chunk as it is generated
+    instead of being collected, and an empty string is returned. Otherwise the streamed
+    chunks are joined, so a long generation is not cut off by the per-read timeout.
+    """
+    if stream is not None:
+        try:
+            _generate_stream(model_name, prompt, stream)
+        except urllib.error.URLError:
+            _run_stream(["ollama", "run", model_name, prompt], stream)
+        return ""
+
+    chunks: list[str] = []
+    try:
+        _generate_stream(model_name, prompt, chunks.append)
+    except urllib.error.URLError:
+        return _run_text(["ollama", "run", model_name, prompt])
+    return "".join(chunks)
+
+
+def _default_concurrency() -> int:
+    # The server only processes OLLAMA_NUM_PARALLEL requests per model at once.
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "")))
+    except ValueError:
+        return 8
+
+
+async def run_model_many(model_name: str, prompts: list[str], concurrency: int | None = None) -> list[str]:
+    """Generate responses for several prompts concurrently; results keep prompt order.
+
+    At most ``concurrency`` requests (default: $OLLAMA_NUM_PARALLEL, else 8) are in flight.
+    """
+    semaphore = asyncio.Semaphore(concurrency or _default_concurrency())
+
+    async def _one(prompt: str) -> str:
+        async with semaphore:
+            return await asyncio.to_thread(run_model, model_name, prompt)
+
+    return list(await asyncio.gather(*(_one(p) for p in prompts)))
+
+
+def run_model_many_sync(model_name: str, prompts: list[str], concurrency: int | None = None) -> list[str]:
+    return asyncio.run(run_model_many(model_name, prompts, concurrency))
+
+
+def _batched_prompt(prompts: list[str]) -> str:
+    parts = [
+        "Answer each of the following questions independently. Start each answer on its own "
+        "line with the marker '### A<n>' matching the question's '### Q<n>' marker, and do "
+        "not repeat the questions.\n\n"
+    ]
+    parts.extend(f"### Q{i}\n{p}\n\n" for i, p in enumerate(prompts, 1))
+    return "".join(parts)
+
+
+def _split_batched_answers(text: str, count: int) -> dict[int, str]:
+    answers: dict[int, str] = {}
+    markers = list(_ANSWER_MARKER_RE.finditer(text))
+    for m, nxt in zip(markers, [*markers[1:], None]):
+        i = int(m.group(1))
+        if 1 <= i <= count and i not in answers:
+            answer = text[m.end() : nxt.start() if nxt else len(text)].strip()
+            # An empty answer counts as missing, so the caller re-asks that prompt.
+            if answer:
+                answers[i] = answer
+    return answers
+
+
+def run_model_batched(model_name: str, prompts: list[str], batch_size: int = _BATCH_SIZE) -> list[str]:
+    """Answer several small prompts with one generation per batch; results keep prompt order.
+
+    Up to ``batch_size`` prompts are sent together as numbered '### Q<n>' sections and the
+    reply is split on the '### A<n>' markers. Any answer the model leaves out or leaves
+    empty is fetched with a separate run_model call.
+    """
+    results: list[str] = []
+    for start in range(0, len(prompts), max(1, batch_size)):
+        batch = prompts[start : start + max(1, batch_size)]
+        if len(batch) == 1:
+            results.append(run_model(model_name, batch[0]))
+            continue
+        answers = _split_batched_answers(run_model(model_name, _batched_prompt(batch)), len(batch))
+        for i, prompt in enumerate(batch, 1):
+            answer = answers.get(i)
+            results.append(answer if answer is not None else run_model(model_name, prompt))
+    return results
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import functools
 import os
-import shutil
+from collections.abc import Iterator
 from pathlib import Path
 
 
@@ -11,31 +12,39 @@ def repo_root() -> Path:
 
 
 def which(executable: str) -> str | None:
-    return shutil.which(executable)
+    # Local import: only reached as a fallback after the known locations are probed.
+    from shutil import which as _which
 
+    return _which(executable)
 
-def find_llama_gguf_split(custom_path: str | None) -> str | None:
-    candidates: list[Path] = []
 
+def _iter_llama_gguf_split_candidates(custom_path: str | None) -> Iterator[Path]:
+    # Lazily yielded so the search stops building/statting paths at the first hit.
     if custom_path:
         p = Path(custom_path)
         if p.exists():
             if p.is_file() and p.name.lower().endswith(".exe"):
-                candidates.append(p)
+                yield p
             else:
-                candidates.append(p / "llama-gguf-split.exe")
-                candidates.append(p / "bin" / "llama-gguf-split.exe")
-
-    candidates += [
-        Path(r"C:\llama.cpp\bin\llama-gguf-split.exe"),
-        Path(r"C:\llama.cpp\llama-gguf-split.exe"),
-        Path(os.path.expandvars(r"%USERPROFILE%\llama.cpp\bin\llama-gguf-split.exe")),
-        Path(os.path.expandvars(r"%USERPROFILE%\llama.cpp\llama-gguf-split.exe")),
-    ]
-
-    for c in candidates:
-        if c and c.exists():
-            return str(c.resolve())
+                yield p / "llama-gguf-split.exe"
+                yield p / "bin" / "llama-gguf-split.exe"
+
+    yield Path(r"C:\llama.cpp\bin\llama-gguf-split.exe")
+    yield Path(r"C:\llama.cpp\llama-gguf-split.exe")
+
+    userprofile = os.environ.get("USERPROFILE")
+    if userprofile:
+        yield Path(userprofile) / "llama.cpp" / "bin" / "llama-gguf-split.exe"
+        yield Path(userprofile) / "llama.cpp" / "llama-gguf-split.exe"
+
+
+@functools.lru_cache(maxsize=8)
+def find_llama_gguf_split(custom_path: str | None) -> str | None:
+    # Memoized per custom_path for the process lifetime; use .cache_clear() to re-probe.
+    for c in _iter_llama_gguf_split_candidates(custom_path):
+        if c.exists():
+            # An absolute, non-symlink path is already usable as-is; skip the realpath walk.
+            return str(c) if c.is_absolute() and not c.is_symlink() else str(c.resolve())
 
     on_path = which("llama-gguf-split")
     return on_path
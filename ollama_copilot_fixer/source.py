@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from urllib.parse import urlparse
 
 
 @dataclass(frozen=True)
@@ -15,6 +14,8 @@ class ParsedSource:
 
 _HF_HOST_RE = re.compile(r"^(?:https?://)?(?P<host>hf\.co|huggingface\.co)/", re.IGNORECASE)
 _OWNER_REPO_RE = re.compile(r"^(?P<owner>[^/\s]+)/(?P<repo>[^/\s]+)$")
+_OLLAMA_CMD_RE = re.compile(r"^\s*ollama\s+(run|pull)\s+(?P<rest>.+)$", re.IGNORECASE)
+_HTTP_RE = re.compile(r"^https?://", re.IGNORECASE)
 
 
 def _split_repo_segment(repo_segment: str) -> tuple[str, str | None]:
@@ -31,18 +32,27 @@ def parse_model_source(model_source: str) -> ParsedSource:
     s = model_source.strip()
 
     # Accept full ollama command text
-    m = re.match(r"^\s*ollama\s+(run|pull)\s+(?P<rest>.+)$", s, re.IGNORECASE)
+    m = _OLLAMA_CMD_RE.match(s)
     if m:
         s = m.group("rest").strip()
 
     # Only consider first token
-    token = s.split()[0]
+    token = s.split(None, 1)[0]
 
     # hf.co / huggingface.co forms
-    if _HF_HOST_RE.match(token):
-        uri = token if re.match(r"^https?://", token, re.IGNORECASE) else f"https://{token}"
-        parsed = urlparse(uri)
-        segments = [seg for seg in parsed.path.split("/") if seg]
+    hm = _HF_HOST_RE.match(token)
+    if hm:
+        rest = token[hm.end():]
+        if "?" in rest or "#" in rest or ";" in rest:
+            # Query/fragment/params: let urlparse decide where the path ends.
+            from urllib.parse import urlparse
+
+            uri = token if _HTTP_RE.match(token) else f"https://{token}"
+            path = urlparse(uri).path
+        else:
+            # The regex already consumed scheme, host and the first "/"; the rest is the path.
+            path = rest
+        segments = [seg for seg in path.split("/") if seg]
         if len(segments) >= 2:
             owner = segments[0]
             repo_segment = segments[1]